@@ -3,63 +3,78 @@ Calendar Sync - Synchronizes Microsoft Teams calendar with Google Calendar.
 """
 
 import sys
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
-import pytz
+from zoneinfo import ZoneInfo
 
 from src.logger import logger
 from src.teams_functions import get_teams_events
 from src.google_calendar import (
     get_calendar_service,
     get_google_events,
-    criar_evento_google,
-    remover_evento_google_by_id
+    criar_eventos_google_batch,
+    remover_eventos_google_batch
 )
-from src.utils import parse_datetime
+from src.utils import parse_datetime, get_sync_period
 from src.config import (
     TEAMS_ICS_URL,
     GOOGLE_SERVICE_ACCOUNT_KEY,
     CALENDAR_ID,
-    CANCEL_PREFIX,
     CANCEL_PREFIXES,
-    LOG_MASK_TITLES,
     LOOKBACK_DAYS,
 )
 
-# Set timezone
-LOCAL_TZ = pytz.timezone('America/Sao_Paulo')
+# Set timezone (stdlib zoneinfo — no pytz localize dance)
+LOCAL_TZ = ZoneInfo('America/Sao_Paulo')
 
 def to_local(dt):
     if dt.tzinfo is None:
-        return LOCAL_TZ.localize(dt)
+        return dt.replace(tzinfo=LOCAL_TZ)
     return dt.astimezone(LOCAL_TZ)
 
-def normalize_event(event, source):
+def normalize_teams_event(event):
+    """Normalize a Teams event into the (title, start_iso, end_iso) key."""
     title = event['titulo'].strip() if event['titulo'] else ''
     start_raw = parse_datetime(event['inicio'])
     end_raw = parse_datetime(event['fim'])
-    if source == 'google':
-        start = start_raw.astimezone(LOCAL_TZ).replace(tzinfo=None, microsecond=0)
-        end = end_raw.astimezone(LOCAL_TZ).replace(tzinfo=None, microsecond=0)
-    else:
-        start = to_local(start_raw).replace(tzinfo=None, microsecond=0)
-        end = to_local(end_raw).replace(tzinfo=None, microsecond=0)
-    logger.debug(f"NORMALIZE({source}): processing event - raw_start={start_raw} raw_end={end_raw} norm_start={start} norm_end={end}")
+    start = to_local(start_raw).replace(tzinfo=None, microsecond=0)
+    end = to_local(end_raw).replace(tzinfo=None, microsecond=0)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("NORMALIZE(teams): processing event - raw_start=%s raw_end=%s norm_start=%s norm_end=%s",
+                     start_raw, end_raw, start, end)
     return (title, start.isoformat(sep='T'), end.isoformat(sep='T'))
 
+def normalize_google_event(event):
+    """Normalize a Google event into the (title, start_iso, end_iso) key."""
+    title = event['titulo'].strip() if event['titulo'] else ''
+    start_raw = parse_datetime(event['inicio'])
+    end_raw = parse_datetime(event['fim'])
+    start = start_raw.astimezone(LOCAL_TZ).replace(tzinfo=None, microsecond=0)
+    end = end_raw.astimezone(LOCAL_TZ).replace(tzinfo=None, microsecond=0)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("NORMALIZE(google): processing event - raw_start=%s raw_end=%s norm_start=%s norm_end=%s",
+                     start_raw, end_raw, start, end)
+    return (title, start.isoformat(sep='T'), end.isoformat(sep='T'))
+
+
+# Lowercased once at import so title checks are a single C-level
+# startswith(tuple) call instead of a per-title generator over prefixes
+_CANCEL_PREFIXES_LOWER = tuple(p.lower() for p in CANCEL_PREFIXES)
 
 def is_canceled_title(title):
     if not title:
         return False
-    normalized_title = title.strip().lower()
-    return any(normalized_title.startswith(prefix.lower()) for prefix in CANCEL_PREFIXES)
+    return title.strip().lower().startswith(_CANCEL_PREFIXES_LOWER)
 
 def strip_cancel_prefix(title):
     """Strip the cancel prefix from a title, returning the original event title."""
     if not title:
         return title
     stripped = title.strip()
-    for prefix in CANCEL_PREFIXES:
-        if stripped.lower().startswith(prefix.lower()):
+    lowered = stripped.lower()
+    for prefix, prefix_lower in zip(CANCEL_PREFIXES, _CANCEL_PREFIXES_LOWER):
+        if lowered.startswith(prefix_lower):
             return stripped[len(prefix):].strip()
     return stripped
 
@@ -86,33 +101,59 @@ def main():
 
     logger.info("Configuration validated successfully.")
 
-    # 1. Fetch Teams events
-    logger.info("1. Fetching Teams events for sync window...")
-    teams_events, start, end = get_teams_events()
+    # 1+2. Fetch Teams and Google events concurrently — the two network
+    # calls are independent once the window is known, so wall time is
+    # max(Teams, Google) instead of their sum
+    logger.info("1. Fetching Teams and Google Calendar events for sync window...")
+    start, end = get_sync_period()
+    svc = get_calendar_service()
+    # With multiple cancel prefixes the lookback sweep (step 4.5) needs an
+    # unfiltered listing anyway, so widen this fetch to cover the lookback
+    # window and partition locally — one events.list pass instead of two.
+    # A single-prefix config keeps its separate server-side q= fetch below.
+    combine_lookback = LOOKBACK_DAYS > 0 and len(CANCEL_PREFIXES) != 1
+    fetch_start = start - timedelta(days=LOOKBACK_DAYS) if combine_lookback else start
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        teams_future = pool.submit(get_teams_events, start, end)
+        google_future = pool.submit(get_google_events, svc, fetch_start, end)
+        teams_events, start, end = teams_future.result()
+        google_events = google_future.result()
     if teams_events is None:
         logger.error("Halting execution due to error fetching Teams events.")
         sys.exit(1)
+    past_google_events = None
+    if combine_lookback:
+        # Split on end time, mirroring timeMin's server-side semantics (a
+        # lower bound on the event's end): events overlapping the window —
+        # early-Monday all-day events, meetings crossing 07:00 — must stay
+        # in the diff side or they would be re-created as missing.
+        past_google_events = [ev for ev in google_events if ev['fim'] <= start]
+        google_events = [ev for ev in google_events if ev['fim'] > start]
     logger.info(f"Found {len(teams_events)} events from Teams")
-
-    # 2. Fetch Google Calendar events
-    logger.info("2. Fetching Google Calendar events for sync window...")
-    svc = get_calendar_service()
-    google_events = get_google_events(svc, start, end)
     logger.info(f"Found {len(google_events)} events in Google Calendar")
 
-    # 3. Build lookup dicts for fast existence checks
-    teams_dict = {}
-    cancelado_events = []
-    for ev in teams_events:
-        titulo = ev.get('titulo') or ''
-        if is_canceled_title(titulo):
-            cancelado_events.append(ev)
-        else:
-            teams_dict[normalize_event(ev, 'teams')] = ev
+    # Hoist global/function lookups to locals for the per-event loops
+    _parse = parse_datetime
+    _to_local = to_local
+    _norm_teams = normalize_teams_event
+    _norm_google = normalize_google_event
+
+    # 3. Build lookup dicts for fast existence checks (C-level comprehensions)
+    cancelado_events = [ev for ev in teams_events if is_canceled_title(ev.get('titulo') or '')]
+    teams_dict = {
+        _norm_teams(ev): ev
+        for ev in teams_events if not is_canceled_title(ev.get('titulo') or '')
+    }
+    google_dict = {_norm_google(ev): ev for ev in google_events}
 
-    google_dict = {}
-    for ev in google_events:
-        google_dict[normalize_event(ev, 'google')] = ev
+    # Duplicate normalized keys collapse silently (last write wins); surface
+    # the counts so duplicate churn in either source is visible in the logs
+    dup_teams = len(teams_events) - len(cancelado_events) - len(teams_dict)
+    dup_google = len(google_events) - len(google_dict)
+    if dup_teams:
+        logger.warning(f"{dup_teams} duplicate Teams event key(s) collapsed in teams_dict")
+    if dup_google:
+        logger.warning(f"{dup_google} duplicate Google event key(s) collapsed in google_dict")
 
     # Counters for summary (privacy friendly)
     created_count = 0
@@ -127,11 +168,12 @@ def main():
 
     # 4. Handle canceled events (no detailed timestamps in logs)
     logger.info("4. Handling canceled events from Teams (privacy masked)...")
+    canceled_to_delete = []
     for cancel_ev in cancelado_events:
         cancel_title = cancel_ev['titulo'].strip()
         original_title = strip_cancel_prefix(cancel_title)
-        cancel_start = to_local(parse_datetime(cancel_ev['inicio'])).replace(tzinfo=None, microsecond=0)
-        cancel_end = to_local(parse_datetime(cancel_ev['fim'])).replace(tzinfo=None, microsecond=0)
+        cancel_start = _to_local(_parse(cancel_ev['inicio'])).replace(tzinfo=None, microsecond=0)
+        cancel_end = _to_local(_parse(cancel_ev['fim'])).replace(tzinfo=None, microsecond=0)
         start_iso = cancel_start.isoformat(sep='T')
         end_iso = cancel_end.isoformat(sep='T')
 
@@ -139,28 +181,21 @@ def main():
         # re-created in step 5 and will be caught as orphan in step 6
         if original_title != cancel_title:
             key_in_teams = (original_title, start_iso, end_iso)
-            if key_in_teams in teams_dict:
-                teams_dict.pop(key_in_teams)
+            if teams_dict.pop(key_in_teams, None) is not None:
                 logger.debug("Removed original event from teams_dict for canceled occurrence")
 
         # Look up by the original (prefix-stripped) title — this is how
         # it was stored in Google before the event was canceled in Teams
         key = (original_title, start_iso, end_iso)
-        g_ev = google_dict.get(key)
+        g_ev = google_dict.pop(key, None)
         if g_ev:
-            remover_evento_google_by_id(
-                svc,
-                g_ev.get('id', None),
-                g_ev['titulo'],
-                g_ev['inicio'],
-                g_ev['fim']
-            )
-            canceled_deleted_count += 1
-            google_dict.pop(key, None)
+            canceled_to_delete.append(g_ev)
         else:
-            logger.debug(f"No Google match for canceled event: date={cancel_start.date()} start={start_iso}")
+            logger.debug("No Google match for canceled event: date=%s start=%s", cancel_start.date(), start_iso)
             missing_cancel_matches += 1
 
+    canceled_deleted_count = remover_eventos_google_batch(svc, canceled_to_delete)
+
     if canceled_deleted_count:
         logger.info(f"Canceled events removed: {canceled_deleted_count}")
     if missing_cancel_matches:
@@ -168,34 +203,40 @@ def main():
 
     # 4.5 Cleanup stale canceled events in Google outside the current sync window
     logger.info("4.5. Cleaning up stale canceled events in Google (lookback window)...")
-    lookback_start = start - timedelta(days=LOOKBACK_DAYS)
-    past_google_events = get_google_events(svc, lookback_start, start)
-    stale_canceled_count = 0
-    for ev in past_google_events:
-        if is_canceled_title(ev.get('titulo', '')):
-            remover_evento_google_by_id(
-                svc,
-                ev.get('id', None),
-                ev['titulo'],
-                ev['inicio'],
-                ev['fim']
-            )
-            stale_canceled_count += 1
-    if stale_canceled_count:
-        logger.info(f"Stale canceled events removed (lookback): {stale_canceled_count}")
+    if LOOKBACK_DAYS > 0:
+        if past_google_events is None:
+            lookback_start = start - timedelta(days=LOOKBACK_DAYS)
+            # With a single configured prefix the filter can run server-side,
+            # shrinking the lookback response to just the canceled candidates;
+            # the client-side check below stays as the authoritative filter
+            past_google_events = get_google_events(svc, lookback_start, start, query=CANCEL_PREFIXES[0])
+        stale_canceled = [ev for ev in past_google_events if is_canceled_title(ev.get('titulo', ''))]
+        stale_canceled_count = remover_eventos_google_batch(svc, stale_canceled)
+        if stale_canceled_count:
+            logger.info(f"Stale canceled events removed (lookback): {stale_canceled_count}")
+        else:
+            logger.info("No stale canceled events found in lookback window.")
     else:
-        logger.info("No stale canceled events found in lookback window.")
+        logger.info("Lookback cleanup disabled (LOOKBACK_DAYS <= 0), skipping fetch.")
 
     # 5. Teams → Google Calendar: create only events not present in Google Calendar
     logger.info("5. Creating missing events in Google Calendar (privacy masked)...")
-    for key, ev in teams_dict.items():
-        if key not in google_dict:
-            criar_evento_google(svc, {
-                'titulo': ev['titulo'],
-                'inicio': to_local(parse_datetime(ev['inicio'])).replace(tzinfo=None, microsecond=0).isoformat(sep='T'),
-                'fim': to_local(parse_datetime(ev['fim'])).replace(tzinfo=None, microsecond=0).isoformat(sep='T')
+    # Single pass classifies every Teams key: matched keys are popped from
+    # google_dict, so whatever remains afterwards is exactly the orphan set
+    # for step 6 — no second probe loop needed.
+    pending_creates = []
+    for key in teams_dict:
+        if google_dict.pop(key, None) is None:
+            # The normalized key already carries the ISO strings built by
+            # the normalize helpers — no need to re-parse and re-format here
+            titulo, inicio_iso, fim_iso = key
+            pending_creates.append({
+                'titulo': titulo,
+                'inicio': inicio_iso,
+                'fim': fim_iso
             })
-            created_count += 1
+
+    created_count = criar_eventos_google_batch(svc, pending_creates)
 
     if created_count == 0:
         logger.info("No new events created.")
@@ -204,45 +245,20 @@ def main():
 
     # 6. Google Calendar → Teams: delete only events not present in Teams
     logger.info("6. Deleting orphan Google events (privacy masked)...")
-    for key, g_ev in google_dict.items():
-        if key not in teams_dict:
-            remover_evento_google_by_id(
-                svc,
-                g_ev.get('id', None),
-                g_ev['titulo'],
-                g_ev['inicio'],
-                g_ev['fim']
-            )
-            deleted_count += 1
+    # Everything left in google_dict — canceled-titled or not — is an
+    # orphan and gets deleted here, so no separate cleanup pass is needed.
+    orphan_events = list(google_dict.values())
+    deleted_count = remover_eventos_google_batch(svc, orphan_events)
 
     if deleted_count == 0:
         logger.info("No orphan events deleted.")
     else:
         logger.info(f"Orphan events deleted: {deleted_count}")
 
-    # 7. Final cleanup: remove any events with canceled titles still remaining in Google
-    logger.info("7. Cleaning up remaining canceled events in Google Calendar...")
-    canceled_cleanup_count = 0
-    for key, g_ev in list(google_dict.items()):
-        if is_canceled_title(g_ev.get('titulo', '')):
-            remover_evento_google_by_id(
-                svc,
-                g_ev.get('id', None),
-                g_ev['titulo'],
-                g_ev['inicio'],
-                g_ev['fim']
-            )
-            canceled_cleanup_count += 1
-
-    if canceled_cleanup_count:
-        logger.info(f"Remaining canceled events cleaned up: {canceled_cleanup_count}")
-    else:
-        logger.info("No remaining canceled events to clean up.")
-
     # Final summary
     logger.info("Sync summary (privacy masked): "
                 f"created={created_count} deleted={deleted_count} canceled_removed={canceled_deleted_count} "
-                f"cleanup={canceled_cleanup_count} cancel_no_match={missing_cancel_matches}")
+                f"cancel_no_match={missing_cancel_matches}")
     logger.info("Calendar Sync Process Completed")
 
 if __name__ == '__main__':
@@ -4,6 +4,7 @@ Configuration for the calendar sync application.
 
 import os
 import hashlib
+from functools import lru_cache
 from pathlib import Path
 
 # Load .env file if present (local development)
@@ -39,8 +40,13 @@ CANCEL_PREFIXES = tuple(
 )
 LOG_MASK_TITLES = _get_bool('LOG_MASK_TITLES', True)
 
+@lru_cache(maxsize=4096)
 def mask_title(title: str) -> str:
-	"""Return masked or original title based on LOG_MASK_TITLES flag."""
+	"""Return masked or original title based on LOG_MASK_TITLES flag.
+
+	Memoized: recurring meetings repeat the same titles, so each one is
+	hashed at most once per run.
+	"""
 	if not LOG_MASK_TITLES:
 		return title
 	if not title:
@@ -48,6 +54,12 @@ def mask_title(title: str) -> str:
 	h = hashlib.sha256(title.encode('utf-8')).hexdigest()[:12]
 	return f"EVENT[{h}]"
 
+# Sidecar cache for the Teams ICS conditional GET (ETag/Last-Modified + body)
+ICS_CACHE_FILE = os.environ.get(
+	'ICS_CACHE_FILE',
+	str(Path(__file__).resolve().parent.parent / '.ics_cache.json')
+)
+
 # Time range configuration
 START_HOUR = 7    # Starting hour for period
 END_HOUR = 18     # Ending hour for period
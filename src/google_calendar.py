@@ -14,25 +14,38 @@ from src.logger import logger
 from src.config import SCOPES, CALENDAR_ID, GOOGLE_SERVICE_ACCOUNT_KEY, TIMEZONE, LOG_MASK_TITLES, mask_title
     
     
+# Constant field sets, hoisted so validation allocates nothing per call
+_REQUIRED_CREDENTIAL_KEYS = frozenset({"type", "project_id", "private_key", "client_email"})
+_REQUIRED_EVENT_FIELDS = ('titulo', 'inicio', 'fim')
+
+# Process-lifetime cache: building the service costs a credential parse and
+# discovery setup (~200ms) that a long-lived scheduler shouldn't pay per sync
+_service_cache = None
+
 def get_calendar_service():
     """
     Initialize the Calendar API using Service Account.
-    
+
+    The built service is cached for the process lifetime, so repeated calls
+    (e.g. from a scheduler loop) reuse the same authenticated client.
+
     Returns:
         Google Calendar API service
-        
+
     Raises:
         ValueError: If credentials are missing or invalid
         json.JSONDecodeError: If credentials JSON is malformed
         Exception: If authentication fails
     """
+    global _service_cache
+    if _service_cache is not None:
+        return _service_cache
     try:
         logger.info("Initializing Google Calendar API service...")
         if not GOOGLE_SERVICE_ACCOUNT_KEY:
             raise ValueError("GOOGLE_SERVICE_ACCOUNT_KEY is not set")
         credentials_info = json.loads(GOOGLE_SERVICE_ACCOUNT_KEY)
-        required_keys = {"type", "project_id", "private_key", "client_email"}
-        missing = [k for k in required_keys if k not in credentials_info or not credentials_info.get(k)]
+        missing = [k for k in _REQUIRED_CREDENTIAL_KEYS if not credentials_info.get(k)]
         if missing:
             raise ValueError(f"Service account credentials missing required fields: {missing}")
         
@@ -41,8 +54,16 @@ def get_calendar_service():
             scopes=SCOPES
         )
 
-        service = build('calendar', 'v3', credentials=credentials)
+        # static_discovery uses the discovery document bundled with
+        # google-api-python-client, skipping the per-run HTTPS discovery fetch
+        service = build(
+            'calendar', 'v3',
+            credentials=credentials,
+            cache_discovery=False,
+            static_discovery=True
+        )
         logger.info("Google Calendar API service initialized successfully")
+        _service_cache = service
         return service
         
     except ValueError as e:
@@ -54,8 +75,12 @@ def get_calendar_service():
     except Exception as e:
         logger.error(f"Unexpected error during authentication: {e}")
 
+# Retries for single HTTP requests are delegated to the client itself via
+# execute(num_retries=...), which backs off with jitter on 429/5xx internally
+NUM_RETRIES = 4
+
 def _retry(callable_fn, *, max_attempts=4, base_delay=0.5, op_name="api_call"):
-    """Simple exponential backoff retry for transient Google API errors."""
+    """Exponential backoff retry for calls without built-in retries (batch executes)."""
     attempt = 0
     while True:
         try:
@@ -78,15 +103,20 @@ def _retry(callable_fn, *, max_attempts=4, base_delay=0.5, op_name="api_call"):
                 continue
             raise
 
-def get_google_events(svc, start, end):
+def get_google_events(svc, start, end, page_size=250, query=None):
     """
     Fetch events from Google Calendar in the given period.
-    
+
+    Pages through the full result set via nextPageToken, so windows with
+    more events than one page are never silently truncated.
+
     Args:
         svc: Google Calendar API service
         start: Start datetime
         end: End datetime
-        
+        page_size: Number of events requested per page
+        query: Optional free-text filter applied server-side (events.list q=)
+
     Returns:
         List of events
         
@@ -98,38 +128,53 @@ def get_google_events(svc, start, end):
         extended_end = end + timedelta(days=1)
         logger.info(f"Fetching Google Calendar events from {start.date()} to {extended_end.date()}")
         
-        def _list_call():
-            return svc.events().list(
-                calendarId=CALENDAR_ID,
-                timeMin=start.isoformat()+'Z',
-                timeMax=extended_end.isoformat()+'Z',
-                singleEvents=True,
-                orderBy='startTime',
-                maxResults=2500
-            ).execute()
-        evs = _retry(_list_call, op_name="events.list").get('items', [])
-        
+        list_kwargs = dict(
+            calendarId=CALENDAR_ID,
+            # timespec='seconds' keeps the string valid RFC3339 even if a
+            # caller ever passes a microsecond-bearing datetime
+            timeMin=start.replace(microsecond=0).isoformat(timespec='seconds')+'Z',
+            timeMax=extended_end.replace(microsecond=0).isoformat(timespec='seconds')+'Z',
+            singleEvents=True,
+            maxResults=page_size,
+            fields='items(id,summary,start(dateTime,date),end(dateTime,date)),nextPageToken'
+        )
+        if query:
+            list_kwargs['q'] = query
+        evs = []
+        request = svc.events().list(**list_kwargs)
+        while request is not None:
+            resp = request.execute(num_retries=NUM_RETRIES)
+            evs.extend(resp.get('items', []))
+            request = svc.events().list_next(request, resp)
+
         logger.info(f"Retrieved {len(evs)} raw events from Google Calendar")
         
         out = []
+        out_append = out.append
+        _fromiso = datetime.fromisoformat
         for ev in evs:
             try:
-                s = ev['start'].get('dateTime') or ev['start'].get('date')
-                f = ev['end'].get('dateTime') or ev['end'].get('date')
-                
+                ev_start = ev['start']
+                ev_end = ev['end']
+                s = ev_start.get('dateTime') or ev_start.get('date')
+                f = ev_end.get('dateTime') or ev_end.get('date')
+
                 if not s or not f:
-                    logger.warning(f"Event with ID {ev.get('id', 'unknown')[:8]}... has missing start/end times, skipping")
+                    logger.warning("Event with ID %s... has missing start/end times, skipping",
+                                   ev.get('id', 'unknown')[:8])
                     continue
-                
-                s = datetime.fromisoformat(s.replace('Z',''))
-                f = datetime.fromisoformat(f.replace('Z',''))
-                
+
+                # Slice off a trailing 'Z' instead of replace(), which would
+                # scan the whole string for a suffix that can only be last
+                s = _fromiso(s[:-1] if s.endswith('Z') else s)
+                f = _fromiso(f[:-1] if f.endswith('Z') else f)
+
                 if s.tzinfo is not None:
                     s = s.astimezone().replace(tzinfo=None)
                 if f.tzinfo is not None:
                     f = f.astimezone().replace(tzinfo=None)
-                    
-                out.append({
+
+                out_append({
                     'id': ev.get('id'),
                     'titulo': ev.get('summary', 'Untitled Event'),
                     'inicio': s,
@@ -162,8 +207,7 @@ def criar_evento_google(svc, ev):
         ev: dict with keys 'titulo', 'inicio', 'fim'
     """
     # Validate event data
-    required_fields = ['titulo', 'inicio', 'fim']
-    missing_fields = [field for field in required_fields if not ev.get(field)]
+    missing_fields = [field for field in _REQUIRED_EVENT_FIELDS if not ev.get(field)]
     if missing_fields:
         logger.error(f"Invalid event data (missing fields: {missing_fields})")
         raise ValueError(f"Event missing required fields: {missing_fields}")
@@ -177,17 +221,17 @@ def criar_evento_google(svc, ev):
     if LOG_MASK_TITLES:
         logger.debug("Creating event")
     else:
-        logger.debug(f"Creating event: {ev['titulo']}")
+        logger.debug("Creating event: %s", ev['titulo'])
 
     try:
-        def _insert_call():
-            return svc.events().insert(calendarId=CALENDAR_ID, body=body).execute()
-        result = _retry(_insert_call, op_name="events.insert")
+        result = svc.events().insert(
+            calendarId=CALENDAR_ID, body=body, fields='id'
+        ).execute(num_retries=NUM_RETRIES)
         event_id = result.get('id', 'unknown')
         if LOG_MASK_TITLES:
-            logger.info(f"Created event in Google Calendar (ID: {event_id[:8]}...)")
+            logger.info("Created event in Google Calendar (ID: %s...)", event_id[:8])
         else:
-            logger.info(f"Created event in Google Calendar: {ev['titulo']} (ID: {event_id[:8]}...)")
+            logger.info("Created event in Google Calendar: %s (ID: %s...)", ev['titulo'], event_id[:8])
     except HttpError as e:
         if LOG_MASK_TITLES:
             logger.error(f"Google Calendar API error creating event: {e}")
@@ -202,6 +246,97 @@ def criar_evento_google(svc, ev):
         logger.error(f"Unexpected error creating event: {e}")
         raise
 
+BATCH_SIZE = 50  # Google Calendar batch endpoint limit
+
+def criar_eventos_google_batch(svc, eventos):
+    """
+    Create multiple events in Google Calendar using batched HTTP requests.
+
+    Collapses N insert round-trips into ceil(N/50) batch calls.
+
+    Args:
+        svc: Google Calendar API service
+        eventos: list of dicts with keys 'titulo', 'inicio', 'fim'
+
+    Returns:
+        int: Number of events created successfully
+    """
+    if not eventos:
+        return 0
+
+    created = 0
+    failed = 0
+
+    def _callback(request_id, response, exception):
+        nonlocal created, failed
+        if exception is not None:
+            failed += 1
+            if LOG_MASK_TITLES:
+                logger.error(f"Batch insert failed for one event: {exception}")
+            else:
+                logger.error(f"Batch insert failed: {exception}")
+        else:
+            created += 1
+
+    for i in range(0, len(eventos), BATCH_SIZE):
+        chunk = eventos[i:i + BATCH_SIZE]
+        batch = svc.new_batch_http_request(callback=_callback)
+        for ev in chunk:
+            body = {
+                'summary': ev['titulo'],
+                'start': {'dateTime': ev['inicio'], 'timeZone': TIMEZONE},
+                'end': {'dateTime': ev['fim'], 'timeZone': TIMEZONE},
+            }
+            batch.add(svc.events().insert(calendarId=CALENDAR_ID, body=body, fields='id'))
+        _retry(batch.execute, op_name="batch.insert")
+
+    logger.info(f"Batch insert finished: {created} created, {failed} failed")
+    return created
+
+def remover_eventos_google_batch(svc, eventos):
+    """
+    Delete multiple events from Google Calendar using batched HTTP requests.
+
+    Args:
+        svc: Google Calendar API service
+        eventos: list of Google event dicts (must carry 'id')
+
+    Returns:
+        int: Number of events deleted successfully (404s count as deleted)
+    """
+    to_delete = [ev for ev in eventos if ev.get('id')]
+    skipped = len(eventos) - len(to_delete)
+    if skipped:
+        logger.warning(f"Skipping {skipped} event(s) without an ID in batch delete")
+    if not to_delete:
+        return 0
+
+    deleted = 0
+    failed = 0
+
+    def _callback(request_id, response, exception):
+        nonlocal deleted, failed
+        if exception is not None:
+            status = getattr(getattr(exception, 'resp', None), 'status', None)
+            if status == 404:
+                # Already gone — treat as deleted, same as the single-event path
+                deleted += 1
+            else:
+                failed += 1
+                logger.error(f"Batch delete failed for one event: {exception}")
+        else:
+            deleted += 1
+
+    for i in range(0, len(to_delete), BATCH_SIZE):
+        chunk = to_delete[i:i + BATCH_SIZE]
+        batch = svc.new_batch_http_request(callback=_callback)
+        for ev in chunk:
+            batch.add(svc.events().delete(calendarId=CALENDAR_ID, eventId=ev['id']))
+        _retry(batch.execute, op_name="batch.delete")
+
+    logger.info(f"Batch delete finished: {deleted} deleted, {failed} failed")
+    return deleted
+
 def remover_evento_google_by_id(svc, event_id, event_title, event_start, event_end):
     """
     Remove an event from Google Calendar by ID with improved error handling.
@@ -228,21 +363,19 @@ def remover_evento_google_by_id(svc, event_id, event_title, event_start, event_e
 
     event_id_partial = event_id[:8] if len(event_id) > 8 else event_id
     if LOG_MASK_TITLES:
-        logger.debug(f"Deleting event (ID: {event_id_partial}...)")
+        logger.debug("Deleting event (ID: %s...)", event_id_partial)
     else:
-        logger.debug(f"Deleting event: {event_title} (ID: {event_id_partial}...)")
+        logger.debug("Deleting event: %s (ID: %s...)", event_title, event_id_partial)
 
     try:
-        def _delete_call():
-            return svc.events().delete(
-                calendarId=CALENDAR_ID,
-                eventId=event_id
-            ).execute()
-        _retry(_delete_call, op_name="events.delete")
+        svc.events().delete(
+            calendarId=CALENDAR_ID,
+            eventId=event_id
+        ).execute(num_retries=NUM_RETRIES)
         if LOG_MASK_TITLES:
             logger.info("Deleted event from Google Calendar")
         else:
-            logger.info(f"Deleted event from Google Calendar: {event_title}")
+            logger.info("Deleted event from Google Calendar: %s", event_title)
         return True
     except HttpError as e:
         if e.resp.status == 404:
@@ -2,22 +2,91 @@
 Microsoft Teams calendar functions.
 """
 
+import copy
+import hashlib
+import json
 import requests
 from datetime import datetime
 from icalendar import Calendar as ICALCalendar
 import recurring_ical_events
 
 from src.logger import logger
-from src.config import TEAMS_ICS_URL
+from src.config import TEAMS_ICS_URL, ICS_CACHE_FILE
 from src.utils import get_sync_period
 
-def get_teams_events():
+# Shared session: keeps the TCP+TLS connection pooled across any requests
+# made in the same process (redirect hops, retries, future fetches)
+_SESSION = requests.Session()
+
+def _load_ics_cache():
+    """Load the cached ICS body and validators from the sidecar file, if any."""
+    try:
+        with open(ICS_CACHE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _save_ics_cache(etag, last_modified, body, parsed=None):
+    """Persist the ICS body, its validators, and the expanded-events sidecar."""
+    try:
+        with open(ICS_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({
+                'etag': etag,
+                'last_modified': last_modified,
+                'body': body,
+                'parsed': parsed,
+            }, f)
+    except OSError as e:
+        logger.warning(f"Could not write ICS cache file: {e}")
+
+def _vevent_may_intersect(comp, start, end):
+    """
+    Cheap check whether a VEVENT can produce occurrences in [start, end].
+
+    Recurring components (RRULE/RDATE/RECURRENCE-ID) are always kept —
+    expansion is the library's job. Plain events are kept only when their
+    date range overlaps the window. Anything unparseable is kept.
+    """
+    try:
+        if comp.get('RRULE') or comp.get('RDATE') or comp.get('RECURRENCE-ID'):
+            return True
+        dtstart = comp.get('DTSTART')
+        if dtstart is None:
+            return True
+        s = dtstart.dt
+        dtend = comp.get('DTEND')
+        if dtend is not None:
+            e = dtend.dt
+        else:
+            # RFC 5545 allows DTSTART + DURATION with no DTEND
+            duration = comp.get('DURATION')
+            e = s + duration.dt if duration is not None else s
+        s_date = s.date() if isinstance(s, datetime) else s
+        e_date = e.date() if isinstance(e, datetime) else e
+        return s_date <= end.date() and e_date >= start.date()
+    except Exception:
+        return True
+
+def _prefilter_calendar(ical, start, end):
+    """Shallow-copy the calendar keeping only VEVENTs that can hit the window."""
+    filtered = copy.copy(ical)
+    filtered.subcomponents = [
+        comp for comp in ical.subcomponents
+        if comp.name != 'VEVENT' or _vevent_may_intersect(comp, start, end)
+    ]
+    return filtered
+
+def get_teams_events(start=None, end=None):
     """
     Fetch events from Teams calendar for current and next week.
-    
+
+    Args:
+        start: Optional period start; defaults to get_sync_period()
+        end: Optional period end; defaults to get_sync_period()
+
     Returns:
         tuple: (events_list, start_date, end_date) or (None, None, None) on error
-        
+
     Raises:
         requests.RequestException: If ICS URL fetch fails
         Exception: If calendar parsing fails
@@ -29,18 +98,57 @@ def get_teams_events():
             logger.error("TEAMS_ICS_URL environment variable is not set")
             return None, None, None
         
-        # Add timeout and proper headers
+        # Add timeout and proper headers, plus conditional-GET validators
+        # from the previous run so an unchanged feed costs a ~200B 304
         headers = {'User-Agent': 'Mozilla/5.0 (compatible; Calendar-Client)'}
-        resp = requests.get(TEAMS_ICS_URL, timeout=30, headers=headers)
-        resp.raise_for_status()
-        
-        logger.info("Successfully fetched Teams calendar data")
-        
+        cached = _load_ics_cache()
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        resp = _SESSION.get(TEAMS_ICS_URL, timeout=30, headers=headers)
+
+        if resp.status_code == 304 and cached and cached.get('body'):
+            logger.info("Teams calendar unchanged (HTTP 304), reusing cached ICS body")
+            ics_body = cached['body']
+            etag = cached.get('etag')
+            last_modified = cached.get('last_modified')
+        else:
+            resp.raise_for_status()
+            # Parse the raw bytes directly — from_ical accepts bytes, and
+            # resp.text would pay an extra charset-detection + decode pass
+            ics_body = resp.content
+            etag = resp.headers.get('ETag')
+            last_modified = resp.headers.get('Last-Modified')
+            logger.info("Successfully fetched Teams calendar data")
+
+        if start is None or end is None:
+            start, end = get_sync_period()
+
+        # If the feed bytes and the sync window both match the previous run,
+        # skip parsing and RRULE expansion entirely and reuse the expansion
+        body_bytes = ics_body if isinstance(ics_body, bytes) else ics_body.encode('utf-8', errors='replace')
+        body_hash = hashlib.sha256(body_bytes).hexdigest()
+        parsed = cached.get('parsed') if cached else None
+        if (parsed and parsed.get('hash') == body_hash
+                and parsed.get('start') == start.isoformat()
+                and parsed.get('end') == end.isoformat()):
+            logger.info("ICS body and sync window unchanged, reusing cached expansion")
+            out = [{'titulo': r['titulo'],
+                    'inicio': datetime.fromisoformat(r['inicio']),
+                    'fim': datetime.fromisoformat(r['fim'])}
+                   for r in parsed['events']]
+            return out, start, end
+
         # Parse calendar data
-        ical = ICALCalendar.from_ical(resp.text)
-        start, end = get_sync_period()
-        
+        ical = ICALCalendar.from_ical(ics_body)
+
         logger.info(f"Parsing events for period: {start.date()} to {end.date()}")
+        # Drop plain VEVENTs that cannot intersect the window before handing
+        # the calendar to recurrence expansion — for a long-lived feed most
+        # components are past one-offs the expander would otherwise walk
+        ical = _prefilter_calendar(ical, start, end)
         events = recurring_ical_events.of(ical).between(start, end)
         
         out = []
@@ -65,6 +173,20 @@ def get_teams_events():
                 logger.warning(f"Error processing individual event: {e_err}")
                 continue
         
+        _save_ics_cache(
+            etag,
+            last_modified,
+            body_bytes.decode('utf-8', errors='replace'),
+            parsed={
+                'hash': body_hash,
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+                'events': [{'titulo': ev['titulo'],
+                            'inicio': ev['inicio'].isoformat(),
+                            'fim': ev['fim'].isoformat()} for ev in out],
+            },
+        )
+
         logger.info(f"Successfully processed {len(out)} Teams events")
         return out, start, end
         
@@ -1,36 +1,57 @@
 """Utility functions for the calendar sync application."""
+import re
 from datetime import datetime, timedelta
+from functools import lru_cache
 from src.logger import logger
+from src.config import START_HOUR, END_HOUR, DAYS_RANGE
+
+# Fast path for the overwhelmingly common 'YYYY-MM-DD[T ]HH:MM:SS' shape;
+# trailing fraction/offset is ignored, matching the strip-the-tz behavior below
+_DT_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})')
+
+@lru_cache(maxsize=2048)
+def _parse_datetime_str(dtstr):
+    """Parse an ISO-ish datetime string, memoized since the same strings repeat."""
+    m = _DT_RE.match(dtstr)
+    if m:
+        return datetime(int(m[1]), int(m[2]), int(m[3]),
+                        int(m[4]), int(m[5]), int(m[6]))
+
+    # Fallback for unusual shapes (date-only, stray whitespace, ...)
+    dtstr = dtstr.replace('T', ' ')
+
+    # Handle timezone information
+    if '+' in dtstr:
+        dtstr = dtstr.split('+')[0]
+    elif '-' in dtstr[11:]:
+        dtstr = dtstr[:19]
+
+    return datetime.fromisoformat(dtstr.strip())
 
 def parse_datetime(dtstr):
     """
     Improved parsing of datetime strings to ensure consistent format.
-    
+
     Args:
         dtstr: Datetime string or datetime object
-    
+
     Returns:
         Datetime object with normalized format (no timezone, no microseconds)
     """
     # Remove any timezone information and standardize format
     if isinstance(dtstr, str):
-        
-        dtstr = dtstr.replace('T', ' ')
-        
-        # Handle timezone information
-        if '+' in dtstr:
-            dtstr = dtstr.split('+')[0]
-        elif '-' in dtstr[11:]:  
-            dtstr = dtstr[:19]  
-            
-        # Parse the datetime
-        dt = datetime.fromisoformat(dtstr.strip())
+        dt = _parse_datetime_str(dtstr)
     else:
         dt = dtstr
-        
+
+    # Already normalized — skip the replace() allocation (the common case
+    # for datetimes coming back through this function a second time)
+    if dt.tzinfo is None and dt.microsecond == 0:
+        return dt
+
     if dt.tzinfo is not None:
         dt = dt.replace(tzinfo=None)
-    
+
     return dt.replace(microsecond=0)
 
 def get_sync_period():
@@ -40,8 +61,6 @@ def get_sync_period():
     Returns:
         tuple: (start_date, end_date) for the sync period
     """
-    from src.config import START_HOUR, END_HOUR, DAYS_RANGE
-    
     hoje = datetime.now()
     seg_atual = hoje - timedelta(days=hoje.weekday())
     